@@ -0,0 +1,181 @@
+"""Numba-compiled kernels for player_value_app.
+
+The app imports this module on first use, so sessions that never analyze a
+player skip Numba's import and kernel loading. Model constants (ladders, weights,
+the current year) stay in the app and are passed in, keeping a single source for them.
+"""
+import numpy as np
+
+try:
+    from numba import njit, prange
+    COMPILED = True
+except ImportError:  # Numba is optional; the kernels below then run as plain Python
+    COMPILED = False
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+    prange = range
+
+
+@njit("float64(float64, float64, float64[:], float64[:], float64[:], float64[:], float64[:], float64[:], "
+      "float64[:], float64[:], float64[:], float64, float64, float64, boolean, boolean, "
+      "float64, float64, float64, float64, float64, float64)", cache=True)
+def premium_factor(league_premium, age, age_bins, age_premiums, keeper_ratios, keeper_goals_per_game,
+                   keeper_premiums, scorer_contributions, scorer_premiums, contract_years_left,
+                   contract_premiums, expiring_years, expiring_premium, current_year, is_goalkeeper,
+                   is_outfield_scorer, goals, assists, clean_sheets, goals_conceded, matches_played,
+                   contract_year):
+    """Asking-price premium; NaN inputs (unparseable fields) simply add nothing.
+    Ages below age_bins[i] (and not below the bin before it) earn age_premiums[i]; the
+    performance and contract ladders earn the premium of the first rung reached."""
+    premium = 1.0 + league_premium
+
+    # Table lookup: count the bins the age falls below (NaN falls below none)
+    bucket = age_bins.size
+    for age_bin in age_bins:
+        if age < age_bin:
+            bucket -= 1
+    premium += age_premiums[bucket]
+
+    if is_goalkeeper:
+        if matches_played > 0:
+            clean_sheet_ratio = clean_sheets / matches_played
+            goals_per_game = goals_conceded / matches_played
+
+            for i in range(keeper_premiums.size):
+                if clean_sheet_ratio > keeper_ratios[i] and goals_per_game < keeper_goals_per_game[i]:
+                    premium += keeper_premiums[i]
+                    break
+    elif is_outfield_scorer:
+        total_contributions = goals + assists
+
+        for i in range(scorer_premiums.size):
+            if total_contributions > scorer_contributions[i]:
+                premium += scorer_premiums[i]
+                break
+
+    years_remaining = contract_year - current_year
+    on_ladder = False
+    for i in range(contract_premiums.size):
+        if years_remaining >= contract_years_left[i]:
+            premium += contract_premiums[i]
+            on_ladder = True
+            break
+    if not on_ladder and years_remaining <= expiring_years:
+        premium += expiring_premium
+
+    return premium
+
+
+@njit("float64(float64[:], float64[:], float64[:], float64, float64)", cache=True)
+def momentum_small(value_history, thresholds, factors, recent_weight, average_weight):
+    """Momentum factor for a short history, as one loop with no temporary arrays.
+    Weighted growth above thresholds[i-1] earns factors[i]."""
+    n_rates = 0
+    total_growth = 0.0
+    last_growth = 0.0
+    previous = 0.0
+    for value in value_history:
+        # Skip missing and non-positive entries, like the vectorized filter
+        if not (value > 0) or value == np.inf:
+            continue
+        if previous > 0:
+            last_growth = (value - previous) / previous
+            total_growth += last_growth
+            n_rates += 1
+        previous = value
+
+    if n_rates == 0:
+        return 1.0
+
+    weighted_growth = recent_weight * last_growth + average_weight * (total_growth / n_rates)
+    bucket = 0
+    for threshold in thresholds:
+        if weighted_growth > threshold:
+            bucket += 1
+    return factors[bucket]
+
+
+@njit("UniTuple(float64[::1], 4)(float64, float64, float64, float64[::1], float64[::1], float64, float64, "
+      "float64[::1], float64, float64, float64)", cache=True)
+def project_value(current_value, age, peak_age, growth_powers, decline_powers, momentum_factor,
+                  playing_time_factor, years_ahead, uncertainty_base, uncertainty_per_year, upside_scale):
+    """Age factor, projected value and low/high range for each whole-year horizon in years_ahead.
+    The age curve grows until peak age and declines for every year past it, read from
+    the growth_powers[k] / decline_powers[k] tables of k-th powers."""
+    n = years_ahead.size
+    age_factor = np.empty(n)
+    projected = np.empty(n)
+    low = np.empty(n)
+    high = np.empty(n)
+    for i in range(n):
+        years = years_ahead[i]
+        years_to_grow = int(min(max(peak_age - age, 0.0), years))
+        years_past_peak = int(max(age + years - peak_age, 0.0))
+        if years_to_grow >= growth_powers.size or years_past_peak >= decline_powers.size:
+            raise ValueError("age or horizon is beyond the age-curve power tables")
+        age_factor[i] = growth_powers[years_to_grow] * decline_powers[years_past_peak]
+        projected[i] = current_value * age_factor[i] * momentum_factor * playing_time_factor
+        uncertainty = uncertainty_base + (uncertainty_per_year * years)
+        low[i] = projected[i] * (1 - uncertainty)
+        high[i] = projected[i] * (1 + uncertainty * upside_scale)
+    return age_factor, projected, low, high
+
+
+# Compiled lazily on the first large squad rather than at import, so the scalar kernels
+# above stay quick to load for sessions that never analyze that many players
+@njit(parallel=True, cache=True)
+def squad_factors(ages, peak_ages, position_codes, value_history, minutes_played, total_available_minutes,
+                  league_premiums, premium_ages, is_goalkeeper, is_outfield_scorer, goals, assists,
+                  clean_sheets, goals_conceded, matches_played, contract_expires, growth_powers,
+                  decline_powers, years_ahead, momentum_thresholds, momentum_factors, recent_weight,
+                  average_weight, playing_time_thresholds, playing_time_factors, age_bins, age_premiums,
+                  keeper_ratios, keeper_goals_per_game, keeper_premiums, scorer_contributions,
+                  scorer_premiums, contract_years_left, contract_premiums, expiring_years,
+                  expiring_premium, current_year):
+    """Per-player factors of the batch analysis, one player per parallel iteration:
+    age factors (N, horizons), momentum, playing time share, playing-time factor and premium.
+    Each player goes through the same steps as the scalar kernels above."""
+    n = ages.size
+    n_horizons = years_ahead.size
+    age_factors = np.empty((n, n_horizons))
+    momentum = np.empty(n)
+    playing_time = np.zeros(n)
+    playing_time_factor = np.ones(n)
+    premium = np.empty(n)
+    # Checked up front: a raise inside the prange body would keep the loop from running in parallel
+    if n > 0 and n_horizons > 0:
+        longest = years_ahead.max()
+        if (min(max((peak_ages - ages).max(), 0), longest) >= growth_powers.size
+                or max((ages - peak_ages).max() + longest, 0) >= decline_powers.shape[1]):
+            raise ValueError("age or horizon is beyond the age-curve power tables")
+    for i in prange(n):
+        code = position_codes[i]
+        for h in range(n_horizons):
+            years = years_ahead[h]
+            years_to_grow = min(max(peak_ages[i] - ages[i], 0), years)
+            years_past_peak = max(ages[i] + years - peak_ages[i], 0)
+            age_factors[i, h] = growth_powers[years_to_grow] * decline_powers[code, years_past_peak]
+
+        momentum[i] = momentum_small(value_history[i], momentum_thresholds, momentum_factors,
+                                     recent_weight, average_weight)
+
+        if total_available_minutes[i] > 0:
+            playing_time[i] = minutes_played[i] / total_available_minutes[i]
+            # Share at or above playing_time_thresholds[k-1] earns playing_time_factors[k]
+            bucket = 0
+            for threshold in playing_time_thresholds:
+                if playing_time[i] >= threshold:
+                    bucket += 1
+            playing_time_factor[i] = playing_time_factors[bucket]
+
+        premium[i] = premium_factor(league_premiums[i], premium_ages[i], age_bins, age_premiums,
+                                    keeper_ratios, keeper_goals_per_game, keeper_premiums,
+                                    scorer_contributions, scorer_premiums, contract_years_left,
+                                    contract_premiums, expiring_years, expiring_premium, current_year,
+                                    is_goalkeeper[i], is_outfield_scorer[i], goals[i], assists[i],
+                                    clean_sheets[i], goals_conceded[i], matches_played[i],
+                                    contract_expires[i])
+    return age_factors, momentum, playing_time, playing_time_factor, premium
+
@@ -1,8 +1,9 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+import functools
+import threading
+from dataclasses import dataclass
 from datetime import datetime
 import io
 
@@ -15,7 +16,7 @@ st.set_page_config(
 )
 
 # Custom CSS for better styling
-st.markdown("""
+_CSS = """
     <style>
     .main-header {
         font-size: 3rem;
@@ -49,19 +50,159 @@ st.markdown("""
         border-left: 4px solid #ffc107;
     }
     </style>
-""", unsafe_allow_html=True)
+"""
+# Re-emitted on every rerun: Streamlit drops elements a rerun does not render again
+st.markdown(_CSS, unsafe_allow_html=True)
+
+_HEADER_HTML = '<h1 class="main-header">⚽ Player Resale Value Estimator</h1>'
+# One compact element per render; filled from a _build_recommendation dict
+_RECOMMENDATION_CARD_HTML = ('<div class="recommendation-{color}"><h3>🎯 Recommendation: {action}</h3>'
+                             '<p>{reasoning}</p></div>')
+
+
+# Position and league encodings shared by the compiled kernels and the batch analyzer
+POSITION_CODES = {'Attacker': 0, 'Midfielder': 1, 'Defender': 2, 'Goalkeeper': 3}
+OTHER_POSITION_CODE = len(POSITION_CODES)
+POSITION_NAMES = np.array([*POSITION_CODES, 'Other'])
+
+# More conservative age curves with slower growth and faster decline, indexed by
+# position code. Unknown positions (OTHER_POSITION_CODE) use the Midfielder curve.
+PEAK_AGE = np.array([27, 28, 29, 31, 28], np.int16)
+DECLINE_RATE = np.array([0.10, 0.09, 0.08, 0.06, 0.09])
+# Reduced growth rate from 0.15 to 0.10 for more conservative projections
+GROWTH_RATE = 0.10
+# Age-curve powers by whole years: GROWTH_POWERS[k] = 1.1**k and
+# DECLINE_POWERS[code, k] = (1 - DECLINE_RATE[code])**k, so age factors are two lookups
+AGE_CURVE_YEARS = 64
+GROWTH_POWERS = np.power(1 + GROWTH_RATE, np.arange(AGE_CURVE_YEARS))
+DECLINE_POWERS = np.power(1 - DECLINE_RATE[:, None], np.arange(AGE_CURVE_YEARS))
+_ATTACKER = POSITION_CODES['Attacker']
+_MIDFIELDER = POSITION_CODES['Midfielder']
+_GOALKEEPER = POSITION_CODES['Goalkeeper']
+
+LEAGUE_TIERS = {
+    'Premier League': 0,
+    'La Liga': 1, 'Bundesliga': 1, 'Serie A': 1,
+    'Ligue 1': 2, 'Primeira Liga': 2, 'Eredivisie': 2,
+}
+OTHER_LEAGUE_TIER = 3
+LEAGUE_TIER_PREMIUM = np.array([0.12, 0.10, 0.06, 0.02])
+
+# Season the contract years count from
+CURRENT_YEAR = 2025
+
+# Age premium ladder: ages below AGE_PREMIUM_BINS[i] (and not below the previous bin) earn
+# AGE_PREMIUM[i]; older ages, and unparseable ones, earn nothing
+AGE_PREMIUM_BINS = np.array([23.0, 25.0, 27.0])
+AGE_PREMIUM = np.array([0.18, 0.10, 0.03, 0.0])
+
+# Goalkeeper premium ladder: the first rung whose clean-sheet ratio is beaten with goals
+# conceded per game under its limit earns GOALKEEPER_PREMIUM[i]
+GOALKEEPER_CLEAN_SHEET_RATIOS = np.array([0.5, 0.4, 0.3])
+GOALKEEPER_GOALS_PER_GAME = np.array([0.8, 1.0, 1.2])
+GOALKEEPER_PREMIUM = np.array([0.15, 0.10, 0.05])
+# Attacker/midfielder ladder: goals + assists above SCORER_CONTRIBUTIONS[i] earn SCORER_PREMIUM[i]
+SCORER_CONTRIBUTIONS = np.array([20.0, 10.0, 5.0])
+SCORER_PREMIUM = np.array([0.15, 0.08, 0.04])
+# Contract ladder: years remaining at or above CONTRACT_YEARS_LEFT[i] earn CONTRACT_PREMIUM[i];
+# CONTRACT_EXPIRING_YEARS or fewer cost CONTRACT_EXPIRING_PREMIUM
+CONTRACT_YEARS_LEFT = np.array([4.0, 3.0, 2.0])
+CONTRACT_PREMIUM = np.array([0.12, 0.08, 0.04])
+CONTRACT_EXPIRING_YEARS = 1.0
+CONTRACT_EXPIRING_PREMIUM = -0.15
+
+# Playing time ladder: a share of available minutes at or above PLAYING_TIME_THRESHOLDS[i-1]
+# earns PLAYING_TIME_FACTORS[i]
+PLAYING_TIME_THRESHOLDS = np.array([0.20, 0.40, 0.60, 0.75])
+PLAYING_TIME_FACTORS = np.array([
+    0.55,  # Limited playing time (<20%) - significant penalty
+    0.70,  # Backup (20-40%)
+    0.85,  # Squad player (40-60%)
+    0.95,  # Frequent player (60-75%)
+    1.0,   # Regular starter (75%+ of available minutes)
+])
+
+# Momentum multiplier ladder: weighted growth above MOMENTUM_THRESHOLDS[i-1] earns MOMENTUM_FACTORS[i]
+MOMENTUM_THRESHOLDS = np.array([-0.1, 0.0, 0.1, 0.2, 0.3])
+MOMENTUM_FACTORS = np.array([0.80, 1.0, 1.05, 1.10, 1.20, 1.30])
+# Weighted growth blends the latest growth rate with the average one
+MOMENTUM_RECENT_WEIGHT = 0.6
+MOMENTUM_AVERAGE_WEIGHT = 0.4
+
+# Projection range: uncertainty of UNCERTAINTY_BASE plus UNCERTAINTY_PER_YEAR per year ahead,
+# below the projection, and UPSIDE_UNCERTAINTY_SCALE times that above it
+UNCERTAINTY_BASE = 0.20
+UNCERTAINTY_PER_YEAR = 0.06
+UPSIDE_UNCERTAINTY_SCALE = 1.3
+
+
+def league_tier(player_data):
+    """League tier code, precomputed at add time; falls back to a lookup for older entries"""
+    tier = player_data.get('league_tier')
+    if tier is None:
+        tier = LEAGUE_TIERS.get(str(player_data.get('league', '')).strip(), OTHER_LEAGUE_TIER)
+    return tier
+
+
+# Horizons (years ahead) of the projection_1y / projection_2y analysis entries
+PROJECTION_YEARS = np.array([1, 2], np.int16)
+
+
+def value_history_np(player_data):
+    """Positive, finite value history as float64, prefiltered at add time; falls back to
+    filtering the raw history for older entries"""
+    history = player_data.get('value_history_np')
+    if history is None:
+        history = np.asarray(player_data['value_history'], dtype=np.float64)
+        history = history[np.isfinite(history) & (history > 0)]
+    return history
+
+
+def premium_stats(player_data):
+    """(goals, assists, clean_sheets, goals_conceded, matches_played, contract_expires) as
+    floats, bad input as NaN; converted at add time, falls back to converting older entries"""
+    stats = player_data.get('premium_stats')
+    if stats is None:
+        to_number = PlayerValueEstimator._to_number
+        stats = (
+            to_number(player_data.get('goals', 0)),
+            to_number(player_data.get('assists', 0)),
+            to_number(player_data.get('clean_sheets', 0), int),
+            to_number(player_data.get('goals_conceded', 0), int),
+            to_number(player_data.get('matches_played', 1), int),
+            to_number(player_data.get('contract_expires', CURRENT_YEAR), int),
+        )
+    return stats
+
+
+# Recommendation codes index these action labels and CSS color suffixes
+RECOMMEND_SELL, RECOMMEND_HOLD, RECOMMEND_CONSIDER = 0, 1, 2
+RECOMMENDATION_ACTIONS = np.array(['SELL', 'HOLD', 'CONSIDER OFFERS'])
+RECOMMENDATION_COLORS = np.array(['sell', 'hold', 'consider'])
+# Table cell highlight per code, matching the .recommendation-* card backgrounds
+RECOMMENDATION_CELL_STYLES = np.array(['background-color: #f8d7da', 'background-color: #d4edda',
+                                       'background-color: #fff3cd'])
+
+
+SMALL_HISTORY_MAX = 8  # histories up to this length take the compiled scalar path
+# Squads of at least this many players use the parallel squad_factors kernel. Below it the
+# kernel saves well under a millisecond, too little to be worth its thread dispatch
+PARALLEL_MIN_SQUAD = 5000
+# Streamlit runs each session's script on its own thread, and Numba's workqueue threading
+# layer (the fallback without TBB or OpenMP) aborts the server on concurrent parallel
+# calls, so squad_factors runs one call at a time
+_SQUAD_FACTORS_LOCK = threading.Lock()
+
+
+@functools.cache
+def _kernels_module():
+    """The compiled kernels, imported on first use: loading the app, and sessions that never
+    analyze a player, then skip Numba's import and kernel loading"""
+    import _kernels
+    return _kernels
 
 
 class PlayerValueEstimator:
-    def __init__(self):
-        # More conservative age curves with slower growth and faster decline
-        self.age_peak_curves = {
-            'Attacker': {'peak_age': 27, 'decline_rate': 0.10},
-            'Midfielder': {'peak_age': 28, 'decline_rate': 0.09},
-            'Defender': {'peak_age': 29, 'decline_rate': 0.08},
-            'Goalkeeper': {'peak_age': 31, 'decline_rate': 0.06}
-        }
-        
     def calculate_playing_time_factor(self, minutes_played, total_available_minutes):
         """
         Calculate multiplier based on playing time percentage in current season.
@@ -77,173 +218,85 @@ class PlayerValueEstimator:
         # Calculate playing time percentage
         playing_time_pct = minutes_played / total_available_minutes
         
-        # Apply factors based on percentage thresholds
-        if playing_time_pct >= 0.75:
-            return 1.0  # Regular starter (75%+ of available minutes)
-        elif playing_time_pct >= 0.60:
-            return 0.95  # Frequent player (60-75%)
-        elif playing_time_pct >= 0.40:
-            return 0.85  # Squad player (40-60%)
-        elif playing_time_pct >= 0.20:
-            return 0.70  # Backup (20-40%)
-        else:
-            return 0.55  # Limited playing time (<20%) - significant penalty
+        # Apply factors based on percentage thresholds, looked up without branching
+        return float(PLAYING_TIME_FACTORS[np.searchsorted(PLAYING_TIME_THRESHOLDS, playing_time_pct, side='right')])
     
     def calculate_age_factor(self, current_age, position, years_ahead=2):
-        """Calculate value multiplier based on age curve - MORE CONSERVATIVE"""
-        curve = self.age_peak_curves.get(position, self.age_peak_curves['Midfielder'])
-        peak_age = curve['peak_age']
-        decline_rate = curve['decline_rate']
-        
-        future_age = current_age + years_ahead
-        
-        # Reduced growth rate from 0.15 to 0.10 for more conservative projections
-        growth_rate = 0.10
+        """
+        Calculate value multiplier based on age curve - MORE CONSERVATIVE.
+        Ages and horizons are whole years; years_ahead may be an array of horizons,
+        giving one factor per horizon.
+        """
+        code = POSITION_CODES.get(position, OTHER_POSITION_CODE)
+        peak_age = PEAK_AGE[code]
         
-        if current_age < peak_age:
-            if future_age <= peak_age:
-                years_to_grow = years_ahead
-                return (1 + growth_rate) ** years_to_grow
-            else:
-                years_to_peak = peak_age - current_age
-                years_past_peak = future_age - peak_age
-                growth_factor = (1 + growth_rate) ** years_to_peak
-                decline_factor = (1 - decline_rate) ** years_past_peak
-                return growth_factor * decline_factor
-        else:
-            years_past_peak = future_age - peak_age
-            return (1 - decline_rate) ** years_past_peak
+        # Grow until peak age, decline for every year beyond it
+        years_to_grow = np.clip(peak_age - int(current_age), 0, years_ahead)
+        years_past_peak = np.maximum(int(current_age) + np.asarray(years_ahead, dtype=int) - peak_age, 0)
+        return GROWTH_POWERS[years_to_grow] * DECLINE_POWERS[code, years_past_peak]
     
     def calculate_momentum_factor(self, value_history):
         """Calculate momentum based on recent value changes - MORE CONSERVATIVE"""
-        values = [v for v in value_history if pd.notna(v) and v > 0]
+        values = np.asarray(value_history, dtype=np.float64)
+        if values.size <= SMALL_HISTORY_MAX:
+            return float(_kernels_module().momentum_small(values, MOMENTUM_THRESHOLDS, MOMENTUM_FACTORS,
+                                                          MOMENTUM_RECENT_WEIGHT, MOMENTUM_AVERAGE_WEIGHT))
+        values = values[np.isfinite(values) & (values > 0)]
         
-        if len(values) < 2:
+        if values.size < 2:
             return 1.0
         
-        growth_rates = []
-        for i in range(1, len(values)):
-            if values[i-1] > 0:
-                rate = (values[i] - values[i-1]) / values[i-1]
-                growth_rates.append(rate)
-        
-        if not growth_rates:
-            return 1.0
+        growth_rates = np.diff(values) / values[:-1]
+        weighted_growth = MOMENTUM_RECENT_WEIGHT * growth_rates[-1] + MOMENTUM_AVERAGE_WEIGHT * growth_rates.mean()
         
-        avg_growth = np.mean(growth_rates)
-        recent_growth = growth_rates[-1] if growth_rates else 0
-        weighted_growth = 0.6 * recent_growth + 0.4 * avg_growth
-        
-        # More conservative momentum multipliers
-        if weighted_growth > 0.3:
-            return 1.30
-        elif weighted_growth > 0.2:
-            return 1.20
-        elif weighted_growth > 0.1:
-            return 1.10
-        elif weighted_growth > 0:
-            return 1.05
-        elif weighted_growth > -0.1:
-            return 1.0
-        else:
-            return 0.80
+        # More conservative momentum multipliers, looked up without branching
+        return float(MOMENTUM_FACTORS[np.searchsorted(MOMENTUM_THRESHOLDS, weighted_growth)])
     
     def calculate_premium_factor(self, player_data):
         """Calculate premium factors for asking price - MORE CONSERVATIVE"""
-        premium = 1.0
-        position = player_data.get('position', 'Midfielder')
-        
-        # League premium - slightly reduced
-        top_tier_1 = ['Premier League']
-        top_tier_2 = ['La Liga', 'Bundesliga', 'Serie A']
-        top_tier_3 = ['Ligue 1', 'Primeira Liga', 'Eredivisie']
-        
-        league = str(player_data.get('league', '')).strip()
-        
-        if league in top_tier_1:
-            premium += 0.12
-        elif league in top_tier_2:
-            premium += 0.10
-        elif league in top_tier_3:
-            premium += 0.06
-        else:
-            premium += 0.02
-        
-        # Age premium - more conservative
-        age = player_data.get('age', 25)
-        if age < 23:
-            premium += 0.18
-        elif age < 25:
-            premium += 0.10
-        elif age < 27:
-            premium += 0.03
-        
-        # Performance premium - position-specific
-        try:
-            if position == 'Goalkeeper':
-                clean_sheets = int(player_data.get('clean_sheets', 0))
-                goals_conceded = int(player_data.get('goals_conceded', 0))
-                matches_played = int(player_data.get('matches_played', 1))
-                
-                if matches_played > 0:
-                    clean_sheet_ratio = clean_sheets / matches_played
-                    goals_per_game = goals_conceded / matches_played
-                    
-                    if clean_sheet_ratio > 0.5 and goals_per_game < 0.8:
-                        premium += 0.15
-                    elif clean_sheet_ratio > 0.4 and goals_per_game < 1.0:
-                        premium += 0.10
-                    elif clean_sheet_ratio > 0.3 and goals_per_game < 1.2:
-                        premium += 0.05
-            
-            elif position in ['Attacker', 'Midfielder']:
-                goals = float(player_data.get('goals', 0))
-                assists = float(player_data.get('assists', 0))
-                total_contributions = goals + assists
-                
-                if total_contributions > 20:
-                    premium += 0.15
-                elif total_contributions > 10:
-                    premium += 0.08
-                elif total_contributions > 5:
-                    premium += 0.04
-            
-        except (ValueError, TypeError):
-            pass
-        
-        # Contract premium - more conservative
-        try:
-            contract_year = int(player_data.get('contract_expires', 2025))
-            current_year = 2025
-            years_remaining = contract_year - current_year
-            
-            if years_remaining >= 4:
-                premium += 0.12
-            elif years_remaining >= 3:
-                premium += 0.08
-            elif years_remaining >= 2:
-                premium += 0.04
-            elif years_remaining <= 1:
-                premium -= 0.15
-        except (ValueError, TypeError):
-            pass
-        
-        return premium
+        position_code = POSITION_CODES.get(player_data.get('position', 'Midfielder'), OTHER_POSITION_CODE)
+        return _kernels_module().premium_factor(
+            LEAGUE_TIER_PREMIUM[league_tier(player_data)],
+            float(player_data.get('age', 25)),
+            AGE_PREMIUM_BINS,
+            AGE_PREMIUM,
+            GOALKEEPER_CLEAN_SHEET_RATIOS,
+            GOALKEEPER_GOALS_PER_GAME,
+            GOALKEEPER_PREMIUM,
+            SCORER_CONTRIBUTIONS,
+            SCORER_PREMIUM,
+            CONTRACT_YEARS_LEFT,
+            CONTRACT_PREMIUM,
+            CONTRACT_EXPIRING_YEARS,
+            CONTRACT_EXPIRING_PREMIUM,
+            CURRENT_YEAR,
+            position_code == _GOALKEEPER,
+            position_code in (_ATTACKER, _MIDFIELDER),
+            *premium_stats(player_data)
+        )
 
     def estimate_future_value(self, current_value, age, position, value_history, 
                             minutes_played, total_available_minutes, years_ahead=2):
-        """Estimate player value in future years with percentage-based playing time"""
-        age_factor = self.calculate_age_factor(age, position, years_ahead)
+        """
+        Estimate player value in future years with percentage-based playing time.
+        Pass an array for years_ahead to project several horizons in one pass; the
+        per-horizon entries (values and age factor) are then arrays too.
+        """
         momentum_factor = self.calculate_momentum_factor(value_history)
         playing_time_factor = self.calculate_playing_time_factor(minutes_played, total_available_minutes)
         
-        # Apply all factors including playing time
-        base_projection = current_value * age_factor * momentum_factor * playing_time_factor
-        
-        # Increased uncertainty for more conservative estimates
-        uncertainty = 0.20 + (0.06 * years_ahead)
-        low_estimate = base_projection * (1 - uncertainty)
-        high_estimate = base_projection * (1 + uncertainty * 1.3)
+        # Age curve, all factors including playing time, and the (more conservative)
+        # uncertainty range, in one compiled call for every horizon
+        code = POSITION_CODES.get(position, OTHER_POSITION_CODE)
+        horizons = np.atleast_1d(np.asarray(years_ahead, dtype=np.float64))
+        age_factor, base_projection, low_estimate, high_estimate = _kernels_module().project_value(
+            float(current_value), float(age), float(PEAK_AGE[code]), GROWTH_POWERS, DECLINE_POWERS[code],
+            momentum_factor, float(playing_time_factor), horizons,
+            UNCERTAINTY_BASE, UNCERTAINTY_PER_YEAR, UPSIDE_UNCERTAINTY_SCALE
+        )
+        if np.ndim(years_ahead) == 0:
+            age_factor, base_projection, low_estimate, high_estimate = (
+                age_factor[0], base_projection[0], low_estimate[0], high_estimate[0])
         
         return {
             'projected_value': base_projection,
@@ -261,18 +314,18 @@ class PlayerValueEstimator:
         age = int(player_data['age'])
         position = player_data['position']
         current_value = float(player_data['current_value'])
-        value_history = player_data['value_history']
+        value_history = value_history_np(player_data)
         minutes_played = int(player_data.get('minutes_played', 0))
         total_available_minutes = int(player_data.get('total_available_minutes', 0))
         
-        # Get projections with playing time consideration
-        projection_1y = self.estimate_future_value(
+        # Get 1- and 2-year projections in one pass with playing time consideration
+        projections = self.estimate_future_value(
             current_value, age, position, value_history, 
-            minutes_played, total_available_minutes, 1
+            minutes_played, total_available_minutes, PROJECTION_YEARS
         )
-        projection_2y = self.estimate_future_value(
-            current_value, age, position, value_history, 
-            minutes_played, total_available_minutes, 2
+        projection_1y, projection_2y = (
+            {key: value[h] if np.ndim(value) else value for key, value in projections.items()}
+            for h in range(2)
         )
         
         # Calculate premium
@@ -316,76 +369,480 @@ class PlayerValueEstimator:
             'recommendation': recommendation
         }
 
+    @staticmethod
+    def _to_number(value, cast=float):
+        """Convert a raw player field, mapping bad input to NaN so it drops out of the masks"""
+        try:
+            return float(cast(value))
+        except (ValueError, TypeError):
+            return np.nan
+
+    def analyze_players_batch(self, players):
+        """
+        Analyze a whole squad at once using parallel NumPy arrays (one entry per player).
+        Produces the same numbers as calling analyze_player on each player.
+        Accepts a list of player dicts or a prebuilt SquadArrays.
+
+        Returns:
+            Dict of arrays; per-horizon arrays have shape (N, 2) for 1 and 2 years ahead
+        """
+        squad = players if isinstance(players, SquadArrays) else SquadArrays.from_players(players)
+        ages = squad.ages
+        pos_codes = squad.position_codes
+        current_values = squad.current_values
+
+        # Age curve lookups by position code
+        peak_ages = PEAK_AGE[pos_codes]
+        years_ahead = PROJECTION_YEARS
+        has_minutes = squad.total_available_minutes > 0
+
+        # League premium by tier; performance premium applies by position group
+        league_premium = LEAGUE_TIER_PREMIUM[squad.league_tiers]
+        is_goalkeeper = pos_codes == _GOALKEEPER
+        is_outfield_scorer = (pos_codes == _ATTACKER) | (pos_codes == _MIDFIELDER)
+
+        factors = None
+        if len(squad) >= PARALLEL_MIN_SQUAD:
+            kernels = _kernels_module()
+            if kernels.COMPILED:  # as plain Python the kernel would be slower than the NumPy version
+                with _SQUAD_FACTORS_LOCK:
+                    factors = kernels.squad_factors(
+                        ages, peak_ages, pos_codes, squad.value_history, squad.minutes_played,
+                        squad.total_available_minutes, league_premium, squad.premium_ages, is_goalkeeper,
+                        is_outfield_scorer, squad.goals, squad.assists, squad.clean_sheets, squad.goals_conceded,
+                        squad.matches_played, squad.contract_expires, GROWTH_POWERS, DECLINE_POWERS, years_ahead,
+                        MOMENTUM_THRESHOLDS, MOMENTUM_FACTORS, MOMENTUM_RECENT_WEIGHT, MOMENTUM_AVERAGE_WEIGHT,
+                        PLAYING_TIME_THRESHOLDS, PLAYING_TIME_FACTORS, AGE_PREMIUM_BINS, AGE_PREMIUM,
+                        GOALKEEPER_CLEAN_SHEET_RATIOS, GOALKEEPER_GOALS_PER_GAME, GOALKEEPER_PREMIUM,
+                        SCORER_CONTRIBUTIONS, SCORER_PREMIUM, CONTRACT_YEARS_LEFT, CONTRACT_PREMIUM,
+                        CONTRACT_EXPIRING_YEARS, CONTRACT_EXPIRING_PREMIUM, CURRENT_YEAR
+                    )
+        if factors is None:
+            factors = self._squad_factors(squad, peak_ages, has_minutes, league_premium,
+                                          is_goalkeeper, is_outfield_scorer)
+        age_factors, momentum_factors, playing_time, playing_time_factors, premiums = factors
+
+        base_projection = (current_values[:, None] * age_factors
+                           * momentum_factors[:, None] * playing_time_factors[:, None])
+        uncertainty = UNCERTAINTY_BASE + (UNCERTAINTY_PER_YEAR * years_ahead)
+
+        asking_now = current_values * premiums * 1.15
+        asking_future = base_projection * premiums[:, None]
+
+        # Recommendation codes: SELL beats HOLD, everything else is CONSIDER
+        years_to_contract = squad.contract_years - CURRENT_YEAR
+        playing_time_good = ~has_minutes | (playing_time >= 0.50)
+        growth_potential = base_projection[:, 0] / current_values
+        sell = (ages >= peak_ages + 1) | (years_to_contract <= 1.5) | ~playing_time_good
+        hold = (ages < peak_ages - 2) & (growth_potential > 1.15) & (years_to_contract >= 3) & playing_time_good
+        recommendation_codes = np.select([sell, hold], [RECOMMEND_SELL, RECOMMEND_HOLD], default=RECOMMEND_CONSIDER)
+
+        return {
+            'current_value': current_values,
+            'asking_price_now': asking_now,
+            'minimum_price_now': asking_now * 0.90,
+            'projected_value': base_projection,
+            'low_estimate': base_projection * (1 - uncertainty),
+            'high_estimate': base_projection * (1 + uncertainty * UPSIDE_UNCERTAINTY_SCALE),
+            'asking_price': asking_future,
+            'minimum_price': asking_future * 0.90,
+            'age_factor': age_factors,
+            'momentum_factor': momentum_factors,
+            'playing_time_factor': playing_time_factors,
+            'playing_time_pct': playing_time * 100,
+            'premium_factor': premiums,
+            'age': ages,
+            'position_code': pos_codes,
+            'peak_age': peak_ages,
+            'growth_potential': growth_potential,
+            'recommendation_code': recommendation_codes,
+            'recommendation_action': RECOMMENDATION_ACTIONS[recommendation_codes],
+        }
+
+    @staticmethod
+    def _squad_factors(squad, peak_ages, has_minutes, league_premium, is_goalkeeper, is_outfield_scorer):
+        """NumPy version of the squad_factors kernel, used for small squads:
+        (age factors, momentum, playing time share, playing-time factor, premium)"""
+        n = len(squad)
+        ages = squad.ages
+        pos_codes = squad.position_codes
+
+        # Age factor for both horizons: grow until peak, then decline
+        years_ahead = PROJECTION_YEARS
+        growth_years = np.clip((peak_ages - ages)[:, None], 0, years_ahead)
+        decline_years = np.maximum((ages - peak_ages)[:, None] + years_ahead, 0)
+        age_factors = GROWTH_POWERS[growth_years] * DECLINE_POWERS[pos_codes[:, None], decline_years]
+
+        # Momentum from the left-aligned, NaN-padded value history matrix
+        hist = squad.value_history
+        rates = np.diff(hist, axis=1) / hist[:, :-1]
+        valid = ~np.isnan(rates)
+        n_rates = valid.sum(axis=1)
+        avg_growth = np.where(valid, rates, 0.0).sum(axis=1) / np.maximum(n_rates, 1)
+        recent_growth = np.where(n_rates > 0, rates[np.arange(n), np.maximum(n_rates - 1, 0)], 0.0)
+        weighted_growth = MOMENTUM_RECENT_WEIGHT * recent_growth + MOMENTUM_AVERAGE_WEIGHT * avg_growth
+        momentum_factors = np.where(n_rates > 0,
+                                    MOMENTUM_FACTORS[np.searchsorted(MOMENTUM_THRESHOLDS, weighted_growth)],
+                                    1.0)
+
+        # Playing time as a share of available minutes
+        playing_time = np.divide(squad.minutes_played, squad.total_available_minutes,
+                                 out=np.zeros(n), where=has_minutes)
+        playing_time_factors = np.where(
+            has_minutes,
+            PLAYING_TIME_FACTORS[np.searchsorted(PLAYING_TIME_THRESHOLDS, playing_time, side='right')],
+            1.0
+        )
+
+        age_premium = AGE_PREMIUM[np.searchsorted(AGE_PREMIUM_BINS, squad.premium_ages, side='right')]
+
+        # Performance premium - position-specific, bad input leaves NaN and adds nothing
+        matches_played = squad.matches_played
+        contributions = squad.goals + squad.assists
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            clean_sheet_ratio = squad.clean_sheets / matches_played
+            goals_per_game = squad.goals_conceded / matches_played
+        goalkeeper_premium = np.select(
+            [(clean_sheet_ratio > ratio) & (goals_per_game < limit)
+             for ratio, limit in zip(GOALKEEPER_CLEAN_SHEET_RATIOS, GOALKEEPER_GOALS_PER_GAME)],
+            GOALKEEPER_PREMIUM,
+            default=0.0
+        )
+        scorer_premium = np.select([contributions > threshold for threshold in SCORER_CONTRIBUTIONS],
+                                   SCORER_PREMIUM, default=0.0)
+        performance_premium = (np.where(is_goalkeeper & (matches_played > 0), goalkeeper_premium, 0.0)
+                               + np.where(is_outfield_scorer, scorer_premium, 0.0))
+
+        years_remaining = squad.contract_expires - CURRENT_YEAR
+        contract_premium = np.select(
+            [*(years_remaining >= years for years in CONTRACT_YEARS_LEFT),
+             years_remaining <= CONTRACT_EXPIRING_YEARS],
+            [*CONTRACT_PREMIUM, CONTRACT_EXPIRING_PREMIUM],
+            default=0.0
+        )
+
+        premiums = 1.0 + league_premium + age_premium + performance_premium + contract_premium
+        return age_factors, momentum_factors, playing_time, playing_time_factors, premiums
+
     def _get_recommendation(self, age, position, projection_1y, current_value, 
                           contract_year, minutes_played, total_available_minutes):
         """Generate recommendation - MORE CONSERVATIVE"""
-        curve = self.age_peak_curves.get(position, self.age_peak_curves['Midfielder'])
-        peak_age = curve['peak_age']
+        peak_age = PEAK_AGE[POSITION_CODES.get(position, OTHER_POSITION_CODE)]
         
         growth_potential = projection_1y['projected_value'] / current_value
-        years_to_contract = contract_year - 2025
+        years_to_contract = contract_year - CURRENT_YEAR
         
         # Playing time consideration (percentage-based)
         if total_available_minutes > 0:
             playing_time_pct = minutes_played / total_available_minutes
             playing_time_good = playing_time_pct >= 0.50  # At least 50% of available minutes
         else:
+            playing_time_pct = 0.0
             playing_time_good = True  # No penalty if season hasn't started
         
         # More conservative SELL recommendations
         if age >= peak_age + 1 or years_to_contract <= 1.5 or not playing_time_good:
+            code = RECOMMEND_SELL
+        # More conservative HOLD recommendations
+        elif age < peak_age - 2 and growth_potential > 1.15 and years_to_contract >= 3 and playing_time_good:
+            code = RECOMMEND_HOLD
+        # Everything else is CONSIDER
+        else:
+            code = RECOMMEND_CONSIDER
+        
+        return self._build_recommendation(code, age, peak_age, contract_year, growth_potential,
+                                          playing_time_pct, total_available_minutes)
+
+    @classmethod
+    def batch_reasoning(cls, players, batch):
+        """Recommendation reasoning per player from analyze_players_batch output, without
+        building the per-player analysis dicts"""
+        return [
+            cls._reasoning(code, int(player['age']), peak_age, player.get('contract_expires', 2027),
+                           growth_potential, pct / 100, int(player.get('total_available_minutes', 0)))
+            for player, code, peak_age, growth_potential, pct in zip(
+                players, batch['recommendation_code'].tolist(), batch['peak_age'].tolist(),
+                batch['growth_potential'].tolist(), batch['playing_time_pct'].tolist())
+        ]
+
+    @classmethod
+    def _build_recommendation(cls, code, age, peak_age, contract_year, growth_potential,
+                              playing_time_pct, total_available_minutes):
+        """Turn a recommendation code into the action/reasoning/color dict shown in the UI"""
+        return {
+            'action': str(RECOMMENDATION_ACTIONS[code]),
+            'reasoning': cls._reasoning(code, age, peak_age, contract_year, growth_potential,
+                                        playing_time_pct, total_available_minutes),
+            'color': str(RECOMMENDATION_COLORS[code])
+        }
+
+    @staticmethod
+    def _reasoning(code, age, peak_age, contract_year, growth_potential,
+                   playing_time_pct, total_available_minutes):
+        """Reasoning sentence for a recommendation code"""
+        if code == RECOMMEND_SELL:
             reason_parts = []
             if age >= peak_age + 1:
                 reason_parts.append(f"age {age} (peak: {peak_age})")
-            if years_to_contract <= 1.5:
+            if contract_year - CURRENT_YEAR <= 1.5:
                 reason_parts.append(f"contract expires soon ({contract_year})")
-            if not playing_time_good and total_available_minutes > 0:
+            if total_available_minutes > 0 and playing_time_pct < 0.50:
                 reason_parts.append(f"limited playing time ({playing_time_pct*100:.0f}%)")
             
             reasoning = "Sell now: " + ", ".join(reason_parts) + ". Value may decline."
-            
-            return {
-                'action': 'SELL',
-                'reasoning': reasoning,
-                'color': 'sell'
-            }
         
-        # More conservative HOLD recommendations
-        elif age < peak_age - 2 and growth_potential > 1.15 and years_to_contract >= 3 and playing_time_good:
+        elif code == RECOMMEND_HOLD:
             if total_available_minutes > 0:
                 reasoning = f"Young player ({age}) with strong growth potential (+{(growth_potential-1)*100:.0f}%) and regular playing time ({playing_time_pct*100:.0f}%)."
             else:
                 reasoning = f"Young player ({age}) with strong growth potential (+{(growth_potential-1)*100:.0f}%)."
-            
-            return {
-                'action': 'HOLD',
-                'reasoning': reasoning,
-                'color': 'hold'
-            }
         
-        # Everything else is CONSIDER
         else:
             if total_available_minutes > 0:
                 reasoning = f"At transition point. Evaluate offers carefully. Playing time: {playing_time_pct*100:.0f}% of available minutes."
             else:
                 reasoning = f"At transition point. Evaluate offers carefully. Monitor playing time throughout season."
-            
-            return {
-                'action': 'CONSIDER OFFERS',
-                'reasoning': reasoning,
-                'color': 'consider'
-            }
+        
+        return reasoning
 
 
-def main():
-    st.markdown('<h1 class="main-header">⚽ Player Resale Value Estimator</h1>', unsafe_allow_html=True)
-    
-    # Initialize session state
+@dataclass
+class SquadArrays:
+    """
+    Squad inputs as parallel arrays (Structure of Arrays), one entry per player.
+    Integer fields use the narrowest exact dtype; all real-valued fields stay float64
+    because float32 rounding flips the model's threshold tests (e.g. 10 -> 11 is
+    exactly +10% in float64 but slightly more in float32). Unparseable stats are NaN.
+    """
+    ages: np.ndarray                     # int16
+    premium_ages: np.ndarray             # float64, age as given (premium ladder)
+    position_codes: np.ndarray           # int8, POSITION_CODES / OTHER_POSITION_CODE
+    league_tiers: np.ndarray             # int8, LEAGUE_TIERS / OTHER_LEAGUE_TIER
+    current_values: np.ndarray
+    minutes_played: np.ndarray           # int32
+    total_available_minutes: np.ndarray  # int32
+    goals: np.ndarray
+    assists: np.ndarray
+    clean_sheets: np.ndarray
+    goals_conceded: np.ndarray
+    matches_played: np.ndarray
+    contract_expires: np.ndarray         # premium input, NaN when unparseable
+    contract_years: np.ndarray           # recommendation input, defaults to 2027
+    value_history: np.ndarray            # (N, max(len, 2)) positive values, left-aligned, NaN-padded
+
+    def __len__(self):
+        return len(self.ages)
+
+    @classmethod
+    def from_players(cls, players):
+        """Build the arrays from player dicts in one pass per field"""
+        n = len(players)
+        goals, assists, clean_sheets, goals_conceded, matches_played, contract_expires = (
+            np.array([premium_stats(p) for p in players], np.float64).reshape(n, 6).T
+        )
+
+        histories = [value_history_np(p) for p in players]
+        lengths = np.fromiter((len(h) for h in histories), np.int16, count=n)
+        hist = np.full((n, max(lengths.max(initial=0), 2)), np.nan)
+        for i, values in enumerate(histories):
+            hist[i, :len(values)] = values
+
+        return cls(
+            ages=np.fromiter((int(p['age']) for p in players), np.int16, count=n),
+            premium_ages=np.fromiter((p.get('age', 25) for p in players), np.float64, count=n),
+            position_codes=np.array([POSITION_CODES.get(p['position'], OTHER_POSITION_CODE) for p in players],
+                                    np.int8),
+            league_tiers=np.fromiter((league_tier(p) for p in players), np.int8, count=n),
+            current_values=np.fromiter((float(p['current_value']) for p in players), np.float64, count=n),
+            minutes_played=np.fromiter((int(p.get('minutes_played', 0)) for p in players), np.int32, count=n),
+            total_available_minutes=np.fromiter((int(p.get('total_available_minutes', 0)) for p in players),
+                                                np.int32, count=n),
+            goals=goals,
+            assists=assists,
+            clean_sheets=clean_sheets,
+            goals_conceded=goals_conceded,
+            matches_played=matches_played,
+            contract_expires=contract_expires,
+            contract_years=np.array([p.get('contract_expires', 2027) for p in players], np.float64),
+            value_history=hist,
+        )
+
+
+# Player fields that feed the valuation, in cache-key order. value_history_np and
+# premium_stats carry the filtered history and converted stats, so players rebuilt
+# from a key skip that work
+PLAYER_FIELDS = (
+    'name', 'age', 'position', 'league', 'league_tier', 'current_value', 'contract_expires',
+    'minutes_played', 'total_available_minutes', 'goals', 'assists',
+    'clean_sheets', 'goals_conceded', 'matches_played', 'value_history_np', 'premium_stats',
+)
+
+
+def _player_key(player):
+    """Snapshot of a player's inputs as (field, value) pairs, used as the analysis cache key
+    (st.cache_data hashes the history array by content). The value history enters already
+    filtered, since only its positive entries affect the model. Fields the player lacks are
+    left out, so dict(key) keeps the model's defaults for them."""
+    derived = {'value_history_np': value_history_np(player), 'premium_stats': premium_stats(player)}
+    return tuple((f, derived[f] if f in derived else player[f])
+                 for f in PLAYER_FIELDS if f in derived or f in player)
+
+
+@st.cache_data(show_spinner=False, max_entries=2048)
+def _analyze_cached(_estimator, key):
+    """Single-player analysis, reused across reruns while the player's inputs are unchanged"""
+    return _estimator.analyze_player(dict(key))
+
+
+# Analyses DataFrame layout, also the Detailed Analysis sheet as exported:
+# (column, dtype, builder(players, batch) -> column values). Numeric columns come
+# straight from the batch arrays, row i being players[i]. Dtypes are compact for
+# the roster fields; money and factors stay float64 so exported values are exactly
+# what the model computed.
+_ANALYSES_COLUMNS = (
+    ('Player', 'str', lambda players, batch: [p['name'] for p in players]),
+    ('Age', 'int16', lambda players, batch: [p['age'] for p in players]),
+    ('Position', 'category', lambda players, batch: [p['position'] for p in players]),
+    ('League', 'category', lambda players, batch: [p['league'] for p in players]),
+    ('Minutes Played', 'int32', lambda players, batch: [p.get('minutes_played', 0) for p in players]),
+    ('Total Available Minutes', 'int32', lambda players, batch: [p.get('total_available_minutes', 0) for p in players]),
+    ('Playing Time %', 'float64', lambda players, batch: batch['playing_time_pct']),
+    ('Current Value', 'float64', lambda players, batch: batch['current_value']),
+    ('Current Asking', 'float64', lambda players, batch: batch['asking_price_now']),
+    ('Current Minimum', 'float64', lambda players, batch: batch['minimum_price_now']),
+    ('1Y Projected', 'float64', lambda players, batch: batch['projected_value'][:, 0]),
+    ('1Y Asking', 'float64', lambda players, batch: batch['asking_price'][:, 0]),
+    ('1Y Minimum', 'float64', lambda players, batch: batch['minimum_price'][:, 0]),
+    ('2Y Projected', 'float64', lambda players, batch: batch['projected_value'][:, 1]),
+    ('2Y Asking', 'float64', lambda players, batch: batch['asking_price'][:, 1]),
+    ('2Y Minimum', 'float64', lambda players, batch: batch['minimum_price'][:, 1]),
+    ('Age Factor', 'float64', lambda players, batch: batch['age_factor'][:, 1]),
+    ('Momentum Factor', 'float64', lambda players, batch: batch['momentum_factor']),
+    ('Playing Time Factor', 'float64', lambda players, batch: batch['playing_time_factor']),
+    ('Premium Factor', 'float64', lambda players, batch: batch['premium_factor']),
+    ('Recommendation', 'category', lambda players, batch: batch['recommendation_action']),
+    ('Reasoning', 'str', PlayerValueEstimator.batch_reasoning),
+)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _analyze_squad_cached(_estimator, keys):
+    """Batched squad analysis, reused across reruns while the squad is unchanged.
+    Returns the raw per-squad arrays and the analyses DataFrame (one row per
+    squad slot) that tables and exports select from."""
+    players = [dict(key) for key in keys]
+    batch = _estimator.analyze_players_batch(players)
+    frame = pd.DataFrame({
+        column: pd.Series(build(players, batch), dtype=dtype) for column, dtype, build in _ANALYSES_COLUMNS
+    })
+    return batch, frame
+
+
+def _init_squad_state():
+    """Create the squad list plus the name index, version and per-version caches derived from it"""
     if 'players' not in st.session_state:
         st.session_state.players = []
+    players = st.session_state.players
+    if 'players_by_name' not in st.session_state:
+        # Reversed so the first player with a given name wins, as a linear scan would
+        st.session_state.players_by_name = {p['name']: p for p in reversed(players)}
+    if 'players_version' not in st.session_state:
+        # Bumped on every squad mutation; the squad analyses are rebuilt only when it moves
+        st.session_state.players_version = 0
+    # Guarded one by one so sessions started before a cache existed get it on their next rerun
+    for cache in ('squad_keys_cache', 'analyses_cache', 'totals_cache', 'players_frame_cache', 'overview_cache'):
+        if cache not in st.session_state:
+            st.session_state[cache] = {'version': -1, 'data': None}
+
+
+def _per_version(cache_name, build):
+    """build() for the current squad, kept in st.session_state[cache_name] and rebuilt only
+    after the squad has changed (players_version moved)"""
+    cache = st.session_state[cache_name]
+    if cache['version'] != st.session_state.players_version:
+        cache['data'] = build()
+        cache['version'] = st.session_state.players_version
+    return cache['data']
+
+
+def _squad_keys():
+    """Cache keys of the current squad's players"""
+    return _per_version('squad_keys_cache', lambda: tuple(_player_key(p) for p in st.session_state.players))
+
+
+def _squad_analyses(estimator):
+    """(batch, frame) for the current squad"""
+    return _per_version('analyses_cache', lambda: _analyze_squad_cached(estimator, _squad_keys()))
+
+
+def _roster_totals():
+    """Value, age and count sums read straight from the roster, so the home page never
+    runs the valuation"""
+    players = st.session_state.players
+    return {
+        'value': sum(float(p['current_value']) for p in players),
+        'age': sum(int(p['age']) for p in players),
+        'count': len(players),
+    }
+
+
+def _squad_totals():
+    """Roster totals for the home page"""
+    return _per_version('totals_cache', _roster_totals)
+
+
+# Roster columns shown on the add page, with compact dtypes for the typed ones
+_PLAYERS_FRAME_COLUMNS = [
+    'name', 'position', 'age', 'league', 'current_value', 'contract_expires', 'minutes_played',
+    'total_available_minutes', 'goals', 'assists', 'clean_sheets', 'goals_conceded',
+]
+_PLAYERS_FRAME_DTYPES = {
+    'age': 'int16', 'minutes_played': 'int32', 'total_available_minutes': 'int32',
+    'position': 'category', 'league': 'category',
+}
+
+
+def _players_frame():
+    """Roster as a columnar DataFrame"""
+    return _per_version('players_frame_cache', lambda: pd.DataFrame(
+        st.session_state.players, columns=_PLAYERS_FRAME_COLUMNS).astype(_PLAYERS_FRAME_DTYPES))
+
+
+def _add_player(player_data):
+    """Append a player and keep the name index and version in sync"""
+    st.session_state.players.append(player_data)
+    st.session_state.players_by_name.setdefault(player_data['name'], player_data)
+    st.session_state.players_version += 1
+
+
+def _remove_player(idx):
+    """Remove the player at idx and keep the name index and version in sync"""
+    player = st.session_state.players.pop(idx)
+    by_name = st.session_state.players_by_name
+    if by_name.get(player['name']) is player:
+        del by_name[player['name']]
+        # Fall back to another player sharing the name, if any
+        same_name = next((p for p in st.session_state.players if p['name'] == player['name']), None)
+        if same_name is not None:
+            by_name[player['name']] = same_name
+    st.session_state.players_version += 1
+
+
+@st.cache_resource(show_spinner=False)
+def get_estimator():
+    """Process-wide estimator; it holds no per-session state, so all sessions can share it"""
+    return PlayerValueEstimator()
+
+
+def main():
+    st.markdown(_HEADER_HTML, unsafe_allow_html=True)
+    
+    # Shared estimator, created once per process
+    estimator = get_estimator()
     
-    # Initialize estimator
-    estimator = PlayerValueEstimator()
+    # Initialize session state
+    _init_squad_state()
     
     # Sidebar navigation
     st.sidebar.title("Navigation")
@@ -394,15 +851,15 @@ def main():
     if page == "Home":
         show_home_page()
     elif page == "Add Players":
-        show_add_players_page()
+        show_add_players_page(estimator)
     elif page == "Player Analysis":
         show_player_analysis_page(estimator)
     elif page == "Squad Overview":
         show_squad_overview_page(estimator)
 
 
-def show_home_page():
-    st.markdown("""
+# Static home page copy, built once at import rather than on every rerun
+_HOME_INTRO_MD = """
     
     ### ✨ Key Features
     - **Percentage-Based Playing Time**: Analyzes playing time as % of available minutes (works at any point in season)
@@ -422,24 +879,28 @@ def show_home_page():
     
     ---
     
-    """)
+    """
+
+
+def show_home_page():
+    st.markdown(_HOME_INTRO_MD)
     
     # Quick stats if players exist
     if st.session_state.players:
         st.markdown("### 📈 Current Squad Statistics")
-        total_value = sum(p['current_value'] for p in st.session_state.players)
+        totals = _squad_totals()
         
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("Total Squad Value", f"€{total_value:,.0f}M")
+            st.metric("Total Squad Value", f"€{totals['value']:,.0f}M")
         with col2:
-            st.metric("Players in Database", len(st.session_state.players))
+            st.metric("Players in Database", totals['count'])
         with col3:
-            avg_age = sum(p['age'] for p in st.session_state.players) / len(st.session_state.players)
+            avg_age = totals['age'] / totals['count']
             st.metric("Average Age", f"{avg_age:.1f}")
 
 
-def show_add_players_page():
+def show_add_players_page(estimator):
     st.subheader("➕ Add New Player")
     
     # First, select position outside the form
@@ -474,7 +935,7 @@ def show_add_players_page():
                                           min_value=0.1, max_value=200.0, 
                                           value=10.0, step=0.5)
             contract_expires = st.number_input("Contract Expires (Year)*", 
-                                             min_value=2025, max_value=2035, 
+                                             min_value=CURRENT_YEAR, max_value=CURRENT_YEAR + 10, 
                                              value=2027)
         
         st.markdown("##### ⏱️ Playing Time (Percentage-Based)")
@@ -587,6 +1048,7 @@ def show_add_players_page():
                     'age': age,
                     'position': position,
                     'league': league,
+                    'league_tier': LEAGUE_TIERS.get(league, OTHER_LEAGUE_TIER),
                     'current_value': current_value,
                     'contract_expires': contract_expires,
                     'minutes_played': minutes_played,
@@ -598,8 +1060,11 @@ def show_add_players_page():
                     'matches_played': matches_played,
                     'value_history': value_history,
                 }
+                # Filtered and converted once here so the analysis paths never redo it
+                player_data['value_history_np'] = value_history_np(player_data)
+                player_data['premium_stats'] = premium_stats(player_data)
                 
-                st.session_state.players.append(player_data)
+                _add_player(player_data)
                 st.success(f"✅ {name} added successfully!")
                 st.balloons()
     
@@ -608,28 +1073,86 @@ def show_add_players_page():
         st.markdown("---")
         st.subheader("Current Squad")
         
-        for idx, player in enumerate(st.session_state.players):
-            playing_pct = (player['minutes_played'] / player['total_available_minutes'] * 100) if player['total_available_minutes'] > 0 else 0
-            
-            with st.expander(f"{player['name']} - {player['position']} - €{player['current_value']}M - Playing Time: {playing_pct:.0f}%"):
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.write(f"**Age:** {player['age']}")
-                    st.write(f"**League:** {player['league']}")
-                with col2:
-                    st.write(f"**Contract:** {player['contract_expires']}")
-                    st.write(f"**Minutes:** {player['minutes_played']}/{player['total_available_minutes']}")
-                with col3:
-                    if player['position'] == 'Goalkeeper':
-                        st.write(f"**Clean Sheets:** {player['clean_sheets']}")
-                        st.write(f"**Goals Conceded:** {player['goals_conceded']}")
-                    elif player['position'] != 'Defender':
-                        st.write(f"**Goals:** {player['goals']}")
-                        st.write(f"**Assists:** {player['assists']}")
-                
-                if st.button(f"🗑️ Remove {player['name']}", key=f"remove_{idx}"):
-                    st.session_state.players.pop(idx)
-                    st.rerun()
+        # One table and one removal control instead of an expander and button per player
+        players = st.session_state.players
+        squad_df = _players_frame()
+        minutes = squad_df['minutes_played'].to_numpy()
+        available = squad_df['total_available_minutes'].to_numpy()
+        is_goalkeeper = squad_df['position'] == 'Goalkeeper'
+        is_scorer = squad_df['position'].isin(['Attacker', 'Midfielder'])
+        
+        # Position-specific stats are left blank where they don't apply
+        st.dataframe(pd.DataFrame({
+            'Player': squad_df['name'],
+            'Position': squad_df['position'],
+            'Age': squad_df['age'],
+            'League': squad_df['league'],
+            'Value (€M)': squad_df['current_value'],
+            'Contract': squad_df['contract_expires'],
+            'Minutes': squad_df['minutes_played'].astype(str) + '/' + squad_df['total_available_minutes'].astype(str),
+            'Playing Time %': np.round(np.divide(minutes * 100, available, out=np.zeros(len(players)),
+                                                 where=available > 0)),
+            'Goals': squad_df['goals'].where(is_scorer).astype('Int64'),
+            'Assists': squad_df['assists'].where(is_scorer).astype('Int64'),
+            'Clean Sheets': squad_df['clean_sheets'].where(is_goalkeeper).astype('Int64'),
+            'Goals Conceded': squad_df['goals_conceded'].where(is_goalkeeper).astype('Int64'),
+        }), use_container_width=True, hide_index=True)
+        
+        to_remove = st.multiselect("Select players to remove", options=list(range(len(players))),
+                                   format_func=lambda idx: players[idx]['name'])
+        if st.button("🗑️ Remove selected", disabled=not to_remove):
+            for idx in sorted(to_remove, reverse=True):
+                _remove_player(idx)
+            st.rerun()
+
+
+# Trajectory series, in legend order: (label, current-value key, projection key)
+_TRAJECTORY_SERIES = (
+    ('Projected Value', 'value', 'projected_value'),
+    ('Asking Price', 'asking_price', 'asking_price'),
+    ('Minimum Price', 'minimum_price', 'minimum_price'),
+)
+
+
+def plot_player_projection(analysis):
+    """Value trajectory chart for one analysis, as a Vega-Lite spec rendered in the browser"""
+    # Chart-only dependency, loaded when a player's page is first opened
+    import altair as alt
+    
+    years = [0, 1, 2]
+    projections = [analysis['projection_1y'], analysis['projection_2y']]
+    current_value = analysis['current']['value']
+    
+    lines = pd.DataFrame({
+        'Years Ahead': years * len(_TRAJECTORY_SERIES),
+        'Series': [label for label, _, _ in _TRAJECTORY_SERIES for _ in years],
+        'Value (€M)': [value
+                       for _, current_key, projection_key in _TRAJECTORY_SERIES
+                       for value in [analysis['current'][current_key]] + [p[projection_key] for p in projections]],
+    })
+    band = pd.DataFrame({
+        'Years Ahead': years,
+        'Low': [current_value] + [p['low_estimate'] for p in projections],
+        'High': [current_value] + [p['high_estimate'] for p in projections],
+    })
+    
+    order = [label for label, _, _ in _TRAJECTORY_SERIES]
+    x = alt.X('Years Ahead:Q', axis=alt.Axis(values=years, format='d'))
+    uncertainty = alt.Chart(band).mark_area(opacity=0.2).encode(
+        x=x, y=alt.Y('Low:Q', title='Value (€M)'), y2='High:Q',
+        tooltip=['Years Ahead', alt.Tooltip('Low:Q', format='.1f'), alt.Tooltip('High:Q', format='.1f')],
+    )
+    trajectory = alt.Chart(lines).mark_line(point=alt.OverlayMarkDef(size=80), strokeWidth=2).encode(
+        x=x,
+        y='Value (€M):Q',
+        color=alt.Color('Series:N', sort=order),
+        strokeDash=alt.StrokeDash('Series:N', sort=order),
+        shape=alt.Shape('Series:N', sort=order),
+        tooltip=['Series', 'Years Ahead', alt.Tooltip('Value (€M):Q', format='.1f')],
+    )
+    return (uncertainty + trajectory).properties(
+        title=f"{analysis['name']} - Value Projection (Conservative Model)", height=400
+    )
 
 
 def show_player_analysis_page(estimator):
@@ -642,10 +1165,10 @@ def show_player_analysis_page(estimator):
     player_names = [p['name'] for p in st.session_state.players]
     selected_name = st.selectbox("Select Player", player_names)
     
-    player_data = next(p for p in st.session_state.players if p['name'] == selected_name)
+    player_data = st.session_state.players_by_name[selected_name]
     
     # Run analysis
-    analysis = estimator.analyze_player(player_data)
+    analysis = _analyze_cached(estimator, _player_key(player_data))
     
     # Display results
     st.markdown("---")
@@ -678,15 +1201,7 @@ def show_player_analysis_page(estimator):
         st.metric("Minimum Price", f"€{analysis['current']['minimum_price']:.1f}M")
     
     # Recommendation
-    rec = analysis['recommendation']
-    rec_class = f"recommendation-{rec['color']}"
-    
-    st.markdown(f"""
-        <div class="{rec_class}">
-            <h3>🎯 Recommendation: {rec['action']}</h3>
-            <p>{rec['reasoning']}</p>
-        </div>
-    """, unsafe_allow_html=True)
+    st.markdown(_RECOMMENDATION_CARD_HTML.format(**analysis['recommendation']), unsafe_allow_html=True)
     
     # Future projections
     st.markdown("### 📈 Value Projections")
@@ -727,45 +1242,7 @@ def show_player_analysis_page(estimator):
     # Value trajectory chart
     st.markdown("### 📊 Value Trajectory")
     
-    fig, ax = plt.subplots(figsize=(10, 6))
-    
-    years = [0, 1, 2]
-    values = [
-        analysis['current']['value'],
-        analysis['projection_1y']['projected_value'],
-        analysis['projection_2y']['projected_value']
-    ]
-    asking_prices = [
-        analysis['current']['asking_price'],
-        analysis['projection_1y']['asking_price'],
-        analysis['projection_2y']['asking_price']
-    ]
-    minimum_prices = [
-        analysis['current']['minimum_price'],
-        analysis['projection_1y']['minimum_price'],
-        analysis['projection_2y']['minimum_price']
-    ]
-    
-    ax.plot(years, values, 'o-', label='Projected Value', linewidth=2, markersize=8)
-    ax.plot(years, asking_prices, 's--', label='Asking Price', linewidth=2, markersize=8)
-    ax.plot(years, minimum_prices, '^:', label='Minimum Price', linewidth=2, markersize=8)
-    
-    ax.fill_between(years, 
-                    [analysis['current']['value'],
-                     analysis['projection_1y']['low_estimate'],
-                     analysis['projection_2y']['low_estimate']],
-                    [analysis['current']['value'],
-                     analysis['projection_1y']['high_estimate'],
-                     analysis['projection_2y']['high_estimate']],
-                    alpha=0.2, label='Uncertainty Range')
-    
-    ax.set_xlabel('Years Ahead', fontsize=12)
-    ax.set_ylabel('Value (€M)', fontsize=12)
-    ax.set_title(f'{selected_name} - Value Projection (Conservative Model)', fontsize=14, fontweight='bold')
-    ax.legend()
-    ax.grid(True, alpha=0.3)
-    
-    st.pyplot(fig)
+    st.altair_chart(plot_player_projection(analysis), use_container_width=True)
     
     # Performance stats section
     st.markdown("### 📋 Performance Statistics")
@@ -794,6 +1271,105 @@ def show_player_analysis_page(estimator):
             st.metric("Total Contributions", player_data['goals'] + player_data['assists'])
 
 
+# Squad Comparison table: analyses-frame column -> displayed column
+_COMPARISON_COLUMNS = {
+    'Player': 'Player', 'Age': 'Age', 'Position': 'Position', 'Playing Time %': 'Playing Time %',
+    'Current Value': 'Current Value', 'Current Asking': 'Asking Price',
+    '1Y Projected': '1Y Projection', '2Y Projected': '2Y Projection', 'Recommendation': 'Recommendation',
+}
+
+
+_money_column = st.column_config.NumberColumn(format='€%.1fM')
+_COMPARISON_COLUMN_CONFIG = {
+    'Playing Time %': st.column_config.NumberColumn(format='%.0f%%'),
+    'Current Value': _money_column,
+    'Asking Price': _money_column,
+    '1Y Projection': _money_column,
+    '2Y Projection': _money_column,
+}
+
+
+def _squad_comparison_frame(frame):
+    """Squad Comparison table; shared by the page and the Excel export. Numeric columns
+    stay numeric so they sort correctly, and the page formats them with _COMPARISON_COLUMN_CONFIG"""
+    return frame[list(_COMPARISON_COLUMNS)].rename(columns=_COMPARISON_COLUMNS)
+
+
+# Squad overview age histogram and recommendation bucket columns
+_AGE_BINS = [16, 21, 24, 27, 30, 35, 40]
+_AGE_LABELS = ['16-20', '21-23', '24-26', '27-29', '30-34', '35-40']
+_BUCKET_LABELS = {RECOMMEND_SELL: '🔴 Recommend SELL', RECOMMEND_CONSIDER: '🟡 CONSIDER OFFERS',
+                  RECOMMEND_HOLD: '🟢 Recommend HOLD'}
+_BUCKET_STYLES = {label: RECOMMENDATION_CELL_STYLES[code] for code, label in _BUCKET_LABELS.items()}
+
+
+def _overview_tables(estimator):
+    """Tables and chart series of the squad overview page"""
+    batch, frame = _squad_analyses(estimator)
+    codes, position_counts = np.unique(batch['position_code'], return_counts=True)
+    age_counts, _ = np.histogram(batch['age'], bins=_AGE_BINS)
+    
+    # Bucket names by action straight from the analyses frame; empty buckets are left out
+    recommendations = frame.groupby('Recommendation', sort=False, observed=True)['Player'].agg(list).to_dict()
+    buckets = pd.DataFrame({
+        label: pd.Series(recommendations[RECOMMENDATION_ACTIONS[code]])
+        for code, label in _BUCKET_LABELS.items() if RECOMMENDATION_ACTIONS[code] in recommendations
+    }).fillna('')
+    
+    return {
+        'comparison': _squad_comparison_frame(frame),
+        'comparison_styles': RECOMMENDATION_CELL_STYLES[batch['recommendation_code']],
+        'positions': pd.Series(position_counts, index=POSITION_NAMES[codes]),
+        'ages': pd.Series(age_counts, index=_AGE_LABELS),
+        'buckets': buckets,
+        # Portfolio totals, summed from the same batch as the comparison table
+        'totals': {
+            'value': float(batch['current_value'].sum()),
+            'asking': float(batch['asking_price_now'].sum()),
+            'projected_1y': float(batch['projected_value'][:, 0].sum()),
+            'projected_2y': float(batch['projected_value'][:, 1].sum()),
+        },
+    }
+
+
+def _squad_overview_tables(estimator):
+    """Overview tables for the current squad, so an unchanged squad's page is layout only"""
+    return _per_version('overview_cache', lambda: _overview_tables(estimator))
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _build_squad_xlsx(_estimator, keys):
+    """Excel export of the squad as bytes, rebuilt only when the squad's inputs change"""
+    frame = _analyze_squad_cached(_estimator, keys)[1]
+    output = io.BytesIO()
+    # xlsxwriter emits the XML directly instead of building an openpyxl cell tree. No
+    # constant_memory: pandas writes cells column by column, which that mode cannot take
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+        _squad_comparison_frame(frame).to_excel(writer, sheet_name='Squad Overview', index=False)
+        frame.to_excel(writer, sheet_name='Detailed Analysis', index=False)
+    return output.getvalue()
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _today_stamp():
+    """YYYYMMDD date for export file names; the TTL lets it roll over without a restart"""
+    return datetime.now().strftime('%Y%m%d')
+
+
+@st.fragment
+def _render_export(estimator):
+    """Export section; the download click reruns only this fragment, not the whole overview page"""
+    st.markdown("### 💾 Export Data")
+    
+    # One always-visible download; the workbook bytes are cached per squad, so reruns don't rebuild them
+    st.download_button(
+        label="📥 Download Squad Analysis (Excel)",
+        data=_build_squad_xlsx(estimator, _squad_keys()),
+        file_name=f"squad_analysis_{_today_stamp()}.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+
+
 def show_squad_overview_page(estimator):
     st.subheader("👥 Squad Overview")
     
@@ -801,17 +1377,22 @@ def show_squad_overview_page(estimator):
         st.warning("No players in database. Please add players first.")
         return
     
-    # Analyze all players
-    analyses = []
-    for player in st.session_state.players:
-        analysis = estimator.analyze_player(player)
-        analyses.append(analysis)
+    # Analyze all players in one vectorized pass and derive the page's tables (cached until
+    # the squad changes)
+    tables = _squad_overview_tables(estimator)
     
-    # Summary metrics
-    total_current = sum(a['current']['value'] for a in analyses)
-    total_asking = sum(a['current']['asking_price'] for a in analyses)
-    total_1y = sum(a['projection_1y']['projected_value'] for a in analyses)
-    total_2y = sum(a['projection_2y']['projected_value'] for a in analyses)
+    # Summary metrics, summed from the same cached batch as the tables
+    totals = tables['totals']
+    total_current = totals['value']
+    total_asking = totals['asking']
+    total_1y = totals['projected_1y']
+    total_2y = totals['projected_2y']
+    # Projection change vs current value; a zero-value squad has no meaningful change
+    if total_current > 0:
+        delta_1y = (total_1y / total_current - 1) * 100
+        delta_2y = (total_2y / total_current - 1) * 100
+    else:
+        delta_1y = delta_2y = 0.0
     
     st.markdown("### 💼 Portfolio Summary")
     
@@ -822,147 +1403,45 @@ def show_squad_overview_page(estimator):
         st.metric("Total Asking Price", f"€{total_asking:.1f}M")
     with col3:
         st.metric("1Y Projection", f"€{total_1y:.1f}M",
-                 delta=f"{((total_1y/total_current-1)*100):.0f}%")
+                 delta=f"{delta_1y:.0f}%")
     with col4:
         st.metric("2Y Projection", f"€{total_2y:.1f}M",
-                 delta=f"{((total_2y/total_current-1)*100):.0f}%")
+                 delta=f"{delta_2y:.0f}%")
     
     # Players table
     st.markdown("### 📋 Squad Comparison")
     
-    df_data = []
-    for analysis in analyses:
-        player = next(p for p in st.session_state.players if p['name'] == analysis['name'])
-        playing_pct = (player['minutes_played'] / player['total_available_minutes'] * 100) if player['total_available_minutes'] > 0 else 0
-        
-        df_data.append({
-            'Player': analysis['name'],
-            'Age': player['age'],
-            'Position': player['position'],
-            'Playing Time %': f"{playing_pct:.0f}%",
-            'Current Value': f"€{analysis['current']['value']:.1f}M",
-            'Asking Price': f"€{analysis['current']['asking_price']:.1f}M",
-            '1Y Projection': f"€{analysis['projection_1y']['projected_value']:.1f}M",
-            '2Y Projection': f"€{analysis['projection_2y']['projected_value']:.1f}M",
-            'Recommendation': analysis['recommendation']['action']
-        })
-    
-    df = pd.DataFrame(df_data)
-    st.dataframe(df, use_container_width=True)
+    # Color the Recommendation column with one vectorized Styler.apply call; numbers are
+    # formatted in the browser via column_config, which takes precedence over Styler text
+    cell_styles = tables['comparison_styles']
+    styled = tables['comparison'].style.apply(lambda _: cell_styles, subset=['Recommendation'])
+    st.dataframe(styled, column_config=_COMPARISON_COLUMN_CONFIG, use_container_width=True)
     
     # Distribution charts
     st.markdown("### 📊 Squad Distribution")
     
     col1, col2 = st.columns(2)
     
+    # Streamlit-native charts render client-side
     with col1:
         # By position
-        position_counts = pd.Series([p['position'] for p in st.session_state.players]).value_counts()
-        fig, ax = plt.subplots(figsize=(8, 6))
-        position_counts.plot(kind='bar', ax=ax, color='skyblue')
-        ax.set_title('Players by Position', fontsize=14, fontweight='bold')
-        ax.set_xlabel('Position')
-        ax.set_ylabel('Count')
-        ax.grid(True, alpha=0.3)
-        plt.xticks(rotation=45)
-        st.pyplot(fig)
+        st.markdown("#### Players by Position")
+        st.bar_chart(tables['positions'], color='#87ceeb')
     
     with col2:
         # By age group
-        ages = [p['age'] for p in st.session_state.players]
-        fig, ax = plt.subplots(figsize=(8, 6))
-        ax.hist(ages, bins=[16, 21, 24, 27, 30, 35, 40], color='lightcoral', edgecolor='black')
-        ax.set_title('Age Distribution', fontsize=14, fontweight='bold')
-        ax.set_xlabel('Age')
-        ax.set_ylabel('Count')
-        ax.grid(True, alpha=0.3)
-        st.pyplot(fig)
+        st.markdown("#### Age Distribution")
+        st.bar_chart(tables['ages'], color='#f08080')
     
     # Recommendations summary
     st.markdown("### 🎯 Transfer Strategy Recommendations")
     
-    recommendations = {}
-    for analysis in analyses:
-        action = analysis['recommendation']['action']
-        if action not in recommendations:
-            recommendations[action] = []
-        recommendations[action].append(analysis['name'])
-    
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        if 'SELL' in recommendations:
-            st.markdown('<div class="recommendation-sell">', unsafe_allow_html=True)
-            st.markdown("#### 🔴 Recommend SELL")
-            for name in recommendations['SELL']:
-                st.write(f"• {name}")
-            st.markdown('</div>', unsafe_allow_html=True)
-    
-    with col2:
-        if 'CONSIDER OFFERS' in recommendations:
-            st.markdown('<div class="recommendation-consider">', unsafe_allow_html=True)
-            st.markdown("#### 🟡 CONSIDER OFFERS")
-            for name in recommendations['CONSIDER OFFERS']:
-                st.write(f"• {name}")
-            st.markdown('</div>', unsafe_allow_html=True)
-    
-    with col3:
-        if 'HOLD' in recommendations:
-            st.markdown('<div class="recommendation-hold">', unsafe_allow_html=True)
-            st.markdown("#### 🟢 Recommend HOLD")
-            for name in recommendations['HOLD']:
-                st.write(f"• {name}")
-            st.markdown('</div>', unsafe_allow_html=True)
+    # All buckets side by side in one table; filled cells are tinted like the recommendation cards
+    st.dataframe(tables['buckets'].style.apply(lambda col: np.where(col != '', _BUCKET_STYLES[col.name], '')),
+                 hide_index=True, use_container_width=True)
     
     # Export functionality
-    st.markdown("### 💾 Export Data")
-    
-    if st.button("📥 Download Squad Analysis (Excel)"):
-        # Create Excel file
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Squad Overview', index=False)
-            
-            # Detailed sheet
-            detailed_data = []
-            for analysis in analyses:
-                player = next(p for p in st.session_state.players if p['name'] == analysis['name'])
-                playing_pct = (player['minutes_played'] / player['total_available_minutes'] * 100) if player['total_available_minutes'] > 0 else 0
-                
-                detailed_data.append({
-                    'Player': analysis['name'],
-                    'Age': player['age'],
-                    'Position': player['position'],
-                    'League': player['league'],
-                    'Minutes Played': player['minutes_played'],
-                    'Total Available Minutes': player['total_available_minutes'],
-                    'Playing Time %': playing_pct,
-                    'Current Value': analysis['current']['value'],
-                    'Current Asking': analysis['current']['asking_price'],
-                    'Current Minimum': analysis['current']['minimum_price'],
-                    '1Y Projected': analysis['projection_1y']['projected_value'],
-                    '1Y Asking': analysis['projection_1y']['asking_price'],
-                    '1Y Minimum': analysis['projection_1y']['minimum_price'],
-                    '2Y Projected': analysis['projection_2y']['projected_value'],
-                    '2Y Asking': analysis['projection_2y']['asking_price'],
-                    '2Y Minimum': analysis['projection_2y']['minimum_price'],
-                    'Age Factor': analysis['projection_2y']['age_factor'],
-                    'Momentum Factor': analysis['projection_2y']['momentum_factor'],
-                    'Playing Time Factor': analysis['projection_2y']['playing_time_factor'],
-                    'Premium Factor': analysis['premium_factor'],
-                    'Recommendation': analysis['recommendation']['action'],
-                    'Reasoning': analysis['recommendation']['reasoning']
-                })
-            
-            pd.DataFrame(detailed_data).to_excel(writer, sheet_name='Detailed Analysis', index=False)
-        
-        output.seek(0)
-        st.download_button(
-            label="📥 Download Excel File",
-            data=output,
-            file_name=f"squad_analysis_{datetime.now().strftime('%Y%m%d')}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
+    _render_export(estimator)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,47 @@
+"""Analyses rebuilt from cache keys behave like direct analyses of the same player."""
+import numpy as np
+import pytest
+
+import player_value_app as app
+
+# Entered before minutes, contract and league tier were recorded: every .get default applies
+SPARSE_PLAYER = {
+    'name': 'Sparse', 'age': 26, 'position': 'Midfielder', 'league': 'Serie A',
+    'current_value': 12.0, 'value_history': [10.0, 12.0],
+}
+FULL_PLAYER = {
+    **SPARSE_PLAYER, 'name': 'Full', 'contract_expires': 2029, 'minutes_played': 1500,
+    'total_available_minutes': 1800, 'goals': 7, 'assists': 6, 'clean_sheets': 0,
+    'goals_conceded': 0, 'matches_played': 20,
+}
+
+
+@pytest.fixture(scope='module')
+def estimator():
+    return app.PlayerValueEstimator()
+
+
+def test_key_leaves_out_missing_fields():
+    fields = dict(app._player_key(SPARSE_PLAYER))
+    for missing in ('minutes_played', 'total_available_minutes', 'contract_expires', 'league_tier'):
+        assert missing not in fields
+
+
+@pytest.mark.parametrize('player', [SPARSE_PLAYER, FULL_PLAYER], ids=['sparse', 'full'])
+def test_cached_analysis_matches_direct(estimator, player):
+    direct = estimator.analyze_player(player)
+    cached = app._analyze_cached(estimator, app._player_key(player))
+    assert cached['recommendation'] == direct['recommendation']
+    for key in ('projection_1y', 'projection_2y'):
+        assert cached[key]['projected_value'] == direct[key]['projected_value']
+    assert cached['premium_factor'] == direct['premium_factor']
+
+
+def test_cached_squad_matches_direct(estimator):
+    players = [SPARSE_PLAYER, FULL_PLAYER]
+    batch, frame = app._analyze_squad_cached(estimator, tuple(app._player_key(p) for p in players))
+    direct = [estimator.analyze_player(p) for p in players]
+    assert list(frame['Recommendation']) == [a['recommendation']['action'] for a in direct]
+    assert list(frame['Minutes Played']) == [0, 1500]
+    np.testing.assert_array_equal(batch['projected_value'][:, 0],
+                                  [a['projection_1y']['projected_value'] for a in direct])
@@ -0,0 +1,163 @@
+"""Parity between the scalar, NumPy batch and compiled squad paths of the valuation model.
+
+The age curve, premium ladder and recommendation rules each exist in more than one
+implementation (scalar methods and kernels, the NumPy batch, the parallel squad kernel);
+these tests pin them to the same results, including at every threshold boundary.
+"""
+import itertools
+import threading
+
+import numpy as np
+import pytest
+
+import _kernels
+import player_value_app as app
+
+POSITIONS = ['Attacker', 'Midfielder', 'Defender', 'Goalkeeper', 'Winger']  # Winger: unknown code
+CONTRACT_YEARS = [2024, 2025, 2026, 2027, 2028, 2029, 2030]
+# (minutes played, total available): none yet, then each playing-time threshold exactly
+PLAYING_TIME = [(0, 0), (0, 900), (180, 900), (360, 900), (450, 900), (540, 900), (675, 900), (900, 900)]
+HISTORIES = [
+    [],
+    [10.0],
+    [10.0, 11.0],                      # exactly +10% growth, a momentum threshold
+    [30.0, 20.0, 15.0],
+    [0.0, float('nan'), 5.0, 8.0],     # missing and non-positive entries are skipped
+    [5.0, 6.0, 5.5, 7.0, 8.0, 7.5, 9.0, 10.0, 12.0, 11.0, 13.0, 14.0],  # longer than SMALL_HISTORY_MAX
+]
+# (goals, assists, clean sheets, goals conceded, matches played); strings and None are bad input
+STATS = [
+    (0, 0, 0, 0, 0),
+    (12, 9, 14, 10, 25),
+    (3, 3, 9, 30, 30),
+    ('abc', 2, 'x', 5, 20),
+    (25, 1, 20, 8, None),
+]
+LEAGUES = ['Premier League', 'La Liga', 'Eredivisie', 'Other', 'Unknown League']
+
+
+def _boundary_squad():
+    """Every position at ages around its peak and every contract year; the remaining
+    inputs cycle with co-prime strides so the combinations vary across players"""
+    players = []
+    for i, (position, age_offset, contract) in enumerate(itertools.product(
+            POSITIONS, [-99, -3, -2, -1, 0, 1, 2, 99], CONTRACT_YEARS)):
+        peak = int(app.PEAK_AGE[app.POSITION_CODES.get(position, app.OTHER_POSITION_CODE)])
+        minutes, available = PLAYING_TIME[i % len(PLAYING_TIME)]
+        goals, assists, clean_sheets, conceded, matches = STATS[i % len(STATS)]
+        history = HISTORIES[(i // 3) % len(HISTORIES)]
+        current_value = 10.0 + (i % 13) * 3.5
+        players.append({
+            'name': f'P{i}', 'age': min(max(peak + age_offset, 16), 40), 'position': position,
+            'league': LEAGUES[i % len(LEAGUES)], 'current_value': current_value,
+            'contract_expires': contract, 'minutes_played': minutes,
+            'total_available_minutes': available, 'goals': goals, 'assists': assists,
+            'clean_sheets': clean_sheets, 'goals_conceded': conceded, 'matches_played': matches,
+            'value_history': history + [current_value] if history else [],
+        })
+    return players
+
+
+@pytest.fixture(scope='module')
+def estimator():
+    return app.PlayerValueEstimator()
+
+
+@pytest.fixture(scope='module')
+def squad():
+    return _boundary_squad()
+
+
+def _batch(estimator, players, monkeypatch, use_kernel):
+    """analyze_players_batch forced onto the NumPy path or the squad_factors kernel. The
+    kernel also runs as plain Python when Numba is missing, so parity is checked either way."""
+    monkeypatch.setattr(app, 'PARALLEL_MIN_SQUAD', 0 if use_kernel else np.iinfo(np.int64).max)
+    if use_kernel:
+        monkeypatch.setattr(_kernels, 'COMPILED', True)
+    return estimator.analyze_players_batch(players)
+
+
+def _assert_close(actual, expected):
+    np.testing.assert_allclose(actual, expected, rtol=1e-12, atol=0)
+
+
+@pytest.mark.parametrize('use_kernel', [False, True], ids=['numpy', 'kernel'])
+def test_batch_matches_scalar(estimator, squad, monkeypatch, use_kernel):
+    batch = _batch(estimator, squad, monkeypatch, use_kernel)
+    analyses = [estimator.analyze_player(p) for p in squad]
+
+    for h, key in enumerate(['projection_1y', 'projection_2y']):
+        for field in ['projected_value', 'low_estimate', 'high_estimate', 'age_factor',
+                      'asking_price', 'minimum_price']:
+            _assert_close(batch[field][:, h], [a[key][field] for a in analyses])
+        for field in ['momentum_factor', 'playing_time_factor', 'playing_time_pct']:
+            _assert_close(batch[field], [a[key][field] for a in analyses])
+    _assert_close(batch['asking_price_now'], [a['current']['asking_price'] for a in analyses])
+    _assert_close(batch['minimum_price_now'], [a['current']['minimum_price'] for a in analyses])
+    _assert_close(batch['premium_factor'], [a['premium_factor'] for a in analyses])
+
+    assert list(batch['recommendation_action']) == [a['recommendation']['action'] for a in analyses]
+    assert (app.PlayerValueEstimator.batch_reasoning(squad, batch)
+            == [a['recommendation']['reasoning'] for a in analyses])
+
+
+def test_kernel_matches_numpy(estimator, squad, monkeypatch):
+    numpy_batch = _batch(estimator, squad, monkeypatch, use_kernel=False)
+    kernel_batch = _batch(estimator, squad, monkeypatch, use_kernel=True)
+    assert numpy_batch.keys() == kernel_batch.keys()
+    for field, values in numpy_batch.items():
+        if values.dtype.kind == 'f':
+            _assert_close(kernel_batch[field], values)
+        else:
+            np.testing.assert_array_equal(kernel_batch[field], values)
+
+
+def test_bad_stats_add_no_premium(estimator, squad):
+    """Unparseable stats come through as NaN and drop out of the premium, never into it"""
+    batch = estimator.analyze_players_batch(squad)
+    assert np.isfinite(batch['premium_factor']).all()
+
+
+@pytest.mark.parametrize('use_kernel', [False, True], ids=['numpy', 'kernel'])
+def test_empty_squad(estimator, monkeypatch, use_kernel):
+    batch = _batch(estimator, [], monkeypatch, use_kernel)
+    assert batch['projected_value'].shape == (0, len(app.PROJECTION_YEARS))
+    assert batch['recommendation_code'].shape == (0,)
+
+
+@pytest.mark.parametrize('position', POSITIONS)
+def test_age_curve_copies_agree(estimator, position):
+    """calculate_age_factor, the project_value kernel and the batch tables give one curve"""
+    code = app.POSITION_CODES.get(position, app.OTHER_POSITION_CODE)
+    horizons = np.arange(0, 6, dtype=np.float64)
+    for age in range(16, 41):
+        method = estimator.calculate_age_factor(age, position, horizons.astype(int))
+        kernel = _kernels.project_value(10.0, float(age), float(app.PEAK_AGE[code]), app.GROWTH_POWERS,
+                                        app.DECLINE_POWERS[code], 1.0, 1.0, horizons, app.UNCERTAINTY_BASE,
+                                        app.UNCERTAINTY_PER_YEAR, app.UPSIDE_UNCERTAINTY_SCALE)[0]
+        np.testing.assert_array_equal(method, kernel)
+
+    players = [{'name': 'P', 'age': age, 'position': position, 'league': 'Other', 'current_value': 10.0,
+                'contract_expires': 2027, 'value_history': [10.0]} for age in range(16, 41)]
+    batch = estimator.analyze_players_batch(players)
+    expected = [estimator.calculate_age_factor(age, position, app.PROJECTION_YEARS) for age in range(16, 41)]
+    np.testing.assert_array_equal(batch['age_factor'], expected)
+
+
+def test_concurrent_kernel_calls(estimator, squad, monkeypatch):
+    """Sessions analyze on their own threads; concurrent kernel calls must not clash"""
+    expected = _batch(estimator, squad, monkeypatch, use_kernel=True)
+    mismatches = []
+
+    def analyze():
+        for _ in range(20):
+            batch = estimator.analyze_players_batch(squad)
+            if not np.array_equal(batch['projected_value'], expected['projected_value']):
+                mismatches.append(batch)
+
+    threads = [threading.Thread(target=analyze) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not mismatches